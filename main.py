@@ -1,36 +1,99 @@
+import asyncio
+import logging
 import os
-from typing import Optional
+from pathlib import PurePosixPath
+from typing import List, Optional
+from urllib.parse import quote
 from fastapi import FastAPI, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-import tempfile
+from starlette.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
 
-from utils import DropboxService
+from utils import DropboxError, DropboxService
 
 # Загружаем переменные окружения
 load_dotenv()
 
-app = FastAPI(title="Dropbox Web Manager")
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Dropbox Web Manager", default_response_class=ORJSONResponse)
+
+# Сжатие HTML и JSON; скачиваемые файлы отдаются как есть
+class PageGZipMiddleware(GZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/download":
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(PageGZipMiddleware, minimum_size=1024, compresslevel=4)
 
 # Настройка шаблонов и статических файлов
-templates = Jinja2Templates(directory="templates")
+# Шаблоны не перечитываются с диска при каждом рендере, скомпилированный код кэшируется
+JINJA_CACHE_DIR = ".jinja_cache"
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+templates = Jinja2Templates(
+    directory="templates",
+    auto_reload=False,
+    bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR)
+)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Файлы больше этого размера отдаются редиректом на временную ссылку Dropbox
+DIRECT_DOWNLOAD_THRESHOLD = 16 * 1024 * 1024
+
 # Инициализация Dropbox сервиса
 DROPBOX_ACCESS_TOKEN = os.getenv("DROPBOX_ACCESS_TOKEN")
 if not DROPBOX_ACCESS_TOKEN:
-    print("⚠️ ВНИМАНИЕ: DROPBOX_ACCESS_TOKEN не найден в .env файле")
+    logger.warning("DROPBOX_ACCESS_TOKEN не найден в .env файле")
     dbx_service = None
 else:
     try:
         dbx_service = DropboxService()
-        print("✅ Dropbox сервис инициализирован")
+        logger.info("Dropbox сервис инициализирован")
     except Exception as e:
-        print(f"❌ Ошибка инициализации Dropbox: {e}")
+        logger.error("Ошибка инициализации Dropbox: %s", e)
         dbx_service = None
 
+# Открытие и закрытие HTTP-сессии Dropbox
+@app.on_event("startup")
+async def startup():
+    if dbx_service:
+        await dbx_service.start()
+        
+        # Прогреваем кэш, чтобы первая загрузка dashboard не ждала Dropbox
+        try:
+            await asyncio.gather(dbx_service.get_user_info(), dbx_service.get_storage_info())
+        except DropboxError as e:
+            logger.warning("Не удалось прогреть кэш Dropbox: %s", e)
+
+@app.on_event("shutdown")
+async def shutdown():
+    if dbx_service:
+        await dbx_service.close()
+
+# Ошибки Dropbox: JSON для API, страница ошибки для остальных
+@app.exception_handler(DropboxError)
+async def dropbox_error_handler(request: Request, exc: DropboxError):
+    if request.url.path.startswith("/api/"):
+        return ORJSONResponse({"error": str(exc)}, status_code=400)
+    
+    return templates.TemplateResponse("error.html", {
+        "request": request,
+        "error": str(exc)
+    }, status_code=400)
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """Проверить, совпадает ли ETag с заголовком If-None-Match запроса"""
+    if etag is None:
+        return False
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
 # Главная страница - Dashboard
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
@@ -40,24 +103,29 @@ async def dashboard(request: Request):
             "error": "Dropbox сервис не инициализирован. Проверьте токен доступа в .env файле."
         })
     
-    try:
-        user_info = dbx_service.get_user_info()
-        storage_info = dbx_service.get_storage_info()
-        
-        # Для отладки
-        print("User Info:", user_info)
-        print("Storage Info:", storage_info)
-        
-        return templates.TemplateResponse("dashboard.html", {
-            "request": request,
-            "user_info": user_info,
-            "storage_info": storage_info
-        })
-    except Exception as e:
-        return templates.TemplateResponse("error.html", {
-            "request": request,
-            "error": f"Ошибка при загрузке данных: {str(e)}"
-        })
+    user_info, storage_info = await asyncio.gather(
+        dbx_service.get_user_info(),
+        dbx_service.get_storage_info()
+    )
+    
+    # Для отладки
+    logger.debug("User Info: %s", user_info)
+    logger.debug("Storage Info: %s", storage_info)
+    
+    return templates.TemplateResponse("dashboard.html", {
+        "request": request,
+        "user_info": user_info,
+        "storage_info": storage_info
+    })
+
+# Информация о текущей папке (корневая, если путь пуст или недоступен)
+async def get_current_folder(path: str) -> dict:
+    if path:
+        try:
+            return await dbx_service.get_metadata(path)
+        except DropboxError:
+            pass
+    return {'name': 'Корневая папка', 'path': ''}
 
 # Просмотр содержимого папки
 @app.get("/folder", response_class=HTMLResponse)
@@ -68,38 +136,42 @@ async def list_folder(request: Request, path: str = ""):
             "error": "Dropbox сервис не инициализирован"
         })
     
-    try:
-        # Получаем информацию о текущей папке
-        if path:
-            current_folder = dbx_service.get_metadata(path)
-            if 'error' in current_folder:
-                current_folder = {'name': 'Корневая папка', 'path': ''}
-        else:
-            current_folder = {'name': 'Корневая папка', 'path': ''}
-        
-        # Получаем содержимое папки
-        items = dbx_service.list_folder(path)
-        
-        # Определяем родительскую папку
+    if request.headers.get("if-none-match"):
+        # Браузер проверяет свою копию: информация о папке нужна, только если она изменилась
+        items = await dbx_service.list_folder(path)
+        current_folder = None
+    else:
+        # Содержимое и информацию о текущей папке получаем параллельно
+        items, current_folder = await asyncio.gather(
+            dbx_service.list_folder(path),
+            get_current_folder(path)
+        )
+    
+    # Содержимое не изменилось - браузер покажет свою копию страницы
+    etag = dbx_service.get_folder_etag(path)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    if current_folder is None:
+        current_folder = await get_current_folder(path)
+    
+    # Определяем родительскую папку
+    parent_path = str(PurePosixPath(path).parent) if path else ""
+    if parent_path in ("/", "."):
+        # Корень в Dropbox API обозначается пустой строкой
         parent_path = ""
-        if path:
-            path_parts = path.rstrip('/').split('/')
-            if len(path_parts) > 1:
-                parent_path = '/'.join(path_parts[:-1])
-        
-        return templates.TemplateResponse("folder.html", {
-            "request": request,
-            "items": items if not isinstance(items, dict) else [],
-            "current_folder": current_folder,
-            "current_path": path,
-            "parent_path": parent_path,
-            "error": items.get('error') if isinstance(items, dict) else None
-        })
-    except Exception as e:
-        return templates.TemplateResponse("error.html", {
-            "request": request,
-            "error": str(e)
-        })
+    
+    response = templates.TemplateResponse("folder.html", {
+        "request": request,
+        "items": items,
+        "current_folder": current_folder,
+        "current_path": path,
+        "parent_path": parent_path
+    })
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    return response
 
 # Создание новой папки
 @app.post("/create-folder")
@@ -113,10 +185,7 @@ async def create_folder(
     
     try:
         folder_path = f"{path}/{folder_name}" if path else f"/{folder_name}"
-        result = dbx_service.create_folder(folder_path)
-        
-        if 'error' in result:
-            return RedirectResponse(f"/folder?path={path}&error={result['error']}", status_code=302)
+        await dbx_service.create_folder(folder_path)
         
         return RedirectResponse(f"/folder?path={path}&success=Папка '{folder_name}' создана", status_code=302)
     except Exception as e:
@@ -133,10 +202,7 @@ async def delete_item(
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
     try:
-        result = dbx_service.delete_item(item_path)
-        
-        if 'error' in result:
-            return RedirectResponse(f"/folder?path={current_path}&error={result['error']}", status_code=302)
+        await dbx_service.delete_item(item_path)
         
         return RedirectResponse(f"/folder?path={current_path}&success=Элемент удален", status_code=302)
     except Exception as e:
@@ -161,13 +227,10 @@ async def upload_file(
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
     try:
-        file_content = await file.read()
         file_path = f"{path}/{file.filename}" if path else f"/{file.filename}"
         
-        result = dbx_service.upload_file(file_content, file_path)
-        
-        if 'error' in result:
-            return RedirectResponse(f"/folder?path={path}&error={result['error']}", status_code=302)
+        # Файл читается чанками внутри сервиса, целиком в память не загружается
+        await dbx_service.upload_file(file, file_path)
         
         return RedirectResponse(f"/folder?path={path}&success=Файл '{file.filename}' загружен", status_code=302)
     except Exception as e:
@@ -175,6 +238,34 @@ async def upload_file(
     finally:
         await file.close()
 
+# Пакетная загрузка нескольких файлов
+@app.post("/upload-batch")
+async def upload_files(
+    request: Request,
+    path: str = Form(""),
+    files: List[UploadFile] = File(...)
+):
+    if not dbx_service:
+        raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
+    
+    try:
+        entries = [
+            (file, f"{path}/{file.filename}" if path else f"/{file.filename}")
+            for file in files
+        ]
+        
+        result = await dbx_service.upload_files(entries)
+        
+        if result['failed']:
+            return RedirectResponse(f"/folder?path={path}&error=Не удалось загрузить: {', '.join(result['failed'])}", status_code=302)
+        
+        return RedirectResponse(f"/folder?path={path}&success=Загружено файлов: {len(result['files'])}", status_code=302)
+    except Exception as e:
+        return RedirectResponse(f"/folder?path={path}&error={str(e)}", status_code=302)
+    finally:
+        for file in files:
+            await file.close()
+
 # Скачивание файла
 @app.get("/download")
 async def download_file(file_path: str):
@@ -182,21 +273,30 @@ async def download_file(file_path: str):
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
     try:
-        result = dbx_service.download_file(file_path)
+        # Большие файлы клиент скачивает напрямую с Dropbox, минуя сервер
+        metadata = await dbx_service.get_metadata(file_path)
+        if metadata.get('size', 0) > DIRECT_DOWNLOAD_THRESHOLD:
+            link = await dbx_service.get_temporary_link(file_path)
+            return RedirectResponse(link, status_code=302)
+        
+        result = await dbx_service.download_file(file_path)
+        
+        # Отдаем содержимое клиенту по мере получения от Dropbox
+        filename = quote(result['filename'])
+        if filename != result['filename']:
+            content_disposition = f"attachment; filename*=utf-8''{filename}"
+        else:
+            content_disposition = f'attachment; filename="{filename}"'
         
-        if 'error' in result:
-            raise HTTPException(status_code=400, detail=result['error'])
+        headers = {'Content-Disposition': content_disposition}
+        if result['size'] is not None:
+            headers['Content-Length'] = str(result['size'])
         
-        # Создаем временный файл для скачивания
-        with tempfile.NamedTemporaryFile(delete=False, suffix=result['filename']) as tmp_file:
-            tmp_file.write(result['content'])
-            tmp_file.flush()
-            
-            return FileResponse(
-                tmp_file.name,
-                filename=result['filename'],
-                media_type='application/octet-stream'
-            )
+        return StreamingResponse(
+            result['content'],
+            media_type='application/octet-stream',
+            headers=headers
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -211,10 +311,7 @@ async def create_shared_link(
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
     try:
-        result = dbx_service.create_shared_link(item_path)
-        
-        if 'error' in result:
-            return RedirectResponse(f"/folder?path={current_path}&error={result['error']}", status_code=302)
+        result = await dbx_service.create_shared_link(item_path)
         
         return RedirectResponse(f"/folder?path={current_path}&success=Ссылка создана: {result['url']}", status_code=302)
     except Exception as e:
@@ -229,19 +326,12 @@ async def shared_links(request: Request):
             "error": "Dropbox сервис не инициализирован"
         })
     
-    try:
-        links = dbx_service.list_shared_links()
-        
-        return templates.TemplateResponse("shared_links.html", {
-            "request": request,
-            "links": links if not isinstance(links, dict) else [],
-            "error": links.get('error') if isinstance(links, dict) else None
-        })
-    except Exception as e:
-        return templates.TemplateResponse("error.html", {
-            "request": request,
-            "error": str(e)
-        })
+    links = await dbx_service.list_shared_links()
+    
+    return templates.TemplateResponse("shared_links.html", {
+        "request": request,
+        "links": links
+    })
 
 # Поиск файлов
 @app.get("/search", response_class=HTMLResponse)
@@ -256,24 +346,14 @@ async def search_files(
             "error": "Dropbox сервис не инициализирован"
         })
     
-    try:
-        if q:
-            results = dbx_service.search(q, path)
-        else:
-            results = []
-        
-        return templates.TemplateResponse("search.html", {
-            "request": request,
-            "query": q,
-            "search_path": path,
-            "results": results if not isinstance(results, dict) else [],
-            "error": results.get('error') if isinstance(results, dict) else None
-        })
-    except Exception as e:
-        return templates.TemplateResponse("error.html", {
-            "request": request,
-            "error": str(e)
-        })
+    results = await dbx_service.search(q, path) if q else []
+    
+    return templates.TemplateResponse("search.html", {
+        "request": request,
+        "query": q,
+        "search_path": path,
+        "results": results
+    })
 
 # Получение метаданных файла (JSON API)
 @app.get("/metadata")
@@ -282,14 +362,11 @@ async def get_metadata(file_path: str):
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
     try:
-        metadata = dbx_service.get_metadata(file_path)
-        
-        if 'error' in metadata:
-            return JSONResponse({"error": metadata['error']}, status_code=400)
+        metadata = await dbx_service.get_metadata(file_path)
         
-        return JSONResponse({"success": True, "metadata": metadata})
+        return ORJSONResponse({"success": True, "metadata": metadata})
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return ORJSONResponse({"error": str(e)}, status_code=400)
 
 # Статус приложения
 @app.get("/status")
@@ -306,21 +383,30 @@ async def api_get_user():
     if not dbx_service:
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
-    return dbx_service.get_user_info()
+    return await dbx_service.get_user_info()
 
 @app.get("/api/storage")
 async def api_get_storage():
     if not dbx_service:
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
-    return dbx_service.get_storage_info()
+    return await dbx_service.get_storage_info()
 
 @app.get("/api/folder")
-async def api_list_folder(path: str = ""):
+async def api_list_folder(request: Request, response: Response, path: str = ""):
     if not dbx_service:
         raise HTTPException(status_code=500, detail="Dropbox сервис не инициализирован")
     
-    return dbx_service.list_folder(path)
+    items = await dbx_service.list_folder(path)
+    
+    etag = dbx_service.get_folder_etag(path)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+    
+    return items
 
 # Или, если хотите оставить возможность запуска из main.py, сделайте так:
 # if __name__ == "__main__":
@@ -1,209 +1,513 @@
-import dropbox
-from dropbox.exceptions import ApiError
+import asyncio
+import functools
+import hashlib
+import json
 import os
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
+
+import aiohttp
 from dotenv import load_dotenv
 
 load_dotenv()
 
+API_URL = "https://api.dropboxapi.com/2"
+CONTENT_URL = "https://content.dropboxapi.com/2"
+
+# Не более ~12 одновременных запросов к Dropbox, иначе too_many_requests
+MAX_CONCURRENT_REQUESTS = 12
+MAX_RETRIES = 5
+
+# Файлы больше одного чанка загружаются через upload session,
+# по UPLOAD_PARALLEL_CHUNKS чанков параллельно
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_PARALLEL_CHUNKS = 4
+
+# Dropbox принимает не более 1000 файлов в одном finish_batch
+UPLOAD_BATCH_SIZE = 1000
+
+# Размер блока при потоковой передаче файлов
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Множитель для перевода байтов в мегабайты
+_INV_MB = 1.0 / (1024 * 1024)
+
+# Время жизни кэша метаданных в секундах
+CACHE_TTL = 30
+# Общие ссылки меняются редко
+SHARED_LINKS_CACHE_TTL = 5 * 60
+# Сколько записей хранит кэш (самые давно использованные вытесняются)
+MAX_CACHE_ENTRIES = 1024
+# Для скольких папок хранятся курсор и содержимое list_folder
+MAX_CACHED_FOLDERS = 256
+
+
+class DropboxError(Exception):
+    """Ошибка при обращении к Dropbox"""
+
+
+class ApiError(DropboxError):
+    """Ошибка, возвращенная Dropbox HTTP API"""
+
+    def __init__(self, status, summary, error=None):
+        super().__init__(summary)
+        self.status = status
+        self.error = error or {}
+
+
+def _parse_datetime(value):
+    """Преобразовать время Dropbox (ISO 8601) в datetime"""
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+
+
+async def _read_chunks(file):
+    """Читать файл блоками в потоке, не закрывая его (в отличие от aiohttp)"""
+    while True:
+        chunk = await asyncio.to_thread(file.read, STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
+def cached(ttl):
+    """Кэшировать результат метода на ttl секунд по ключу (имя метода, путь)"""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            path = args[0] if args else kwargs.get('path', "")
+            key = (method.__name__, path.rstrip('/').lower())
+            now = time.monotonic()
+            entry = self._cache.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._cache.move_to_end(key)
+                    return entry[1]
+                del self._cache[key]
+
+            value = await method(self, *args, **kwargs)
+            self._cache[key] = (now + ttl, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+            return value
+        return wrapper
+    return decorator
+
+
 class DropboxService:
     def __init__(self):
         access_token = os.getenv("DROPBOX_ACCESS_TOKEN")
         if not access_token:
             raise ValueError("DROPBOX_ACCESS_TOKEN не найден в .env файле")
-        self.dbx = dropbox.Dropbox(access_token)
-    
-    def get_user_info(self):
-        """Получить информацию о пользователе"""
-        try:
-            user = self.dbx.users_get_current_account()
-            return {
-                'name': user.name.display_name,
-                'email': user.email,
-                'country': user.country if hasattr(user, 'country') else None,
-                'profile_photo_url': user.profile_photo_url if hasattr(user, 'profile_photo_url') else None
-            }
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def get_storage_info(self):
-        """Получить информацию о хранилище"""
+        self._headers = {'Authorization': f'Bearer {access_token}'}
+        self.session = None
+        self._sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._cache = OrderedDict()
+        # Последний курсор list_folder, содержимое и ETag по каждой папке
+        self._cursors = OrderedDict()
+
+    async def start(self):
+        """Открыть HTTP-сессию (вызывается при старте приложения)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=20)
+            self.session = aiohttp.ClientSession(connector=connector, headers=self._headers)
+
+    async def close(self):
+        """Закрыть HTTP-сессию (вызывается при остановке приложения)"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _raise_for_status(self, response):
+        """Преобразовать ответ с ошибкой в ApiError"""
+        if response.status == 200:
+            return
+        text = await response.text()
         try:
-            usage = self.dbx.users_get_space_usage()
-            used = usage.used
-            allocation = usage.allocation
-            
-            # Проверяем тип выделенного пространства
-            if hasattr(allocation, 'get_individual'):
-                allocated = allocation.get_individual().allocated
-            elif hasattr(allocation, 'allocated'):
-                allocated = allocation.allocated
-            elif hasattr(allocation, 'is_individual') and allocation.is_individual():
-                allocated = allocation.get_individual().allocated
-            else:
-                allocated = 0
-            
-            free = allocated - used if allocated > 0 else 0
-            
-            return {
-                'used': self._bytes_to_mb(used),
-                'allocated': self._bytes_to_mb(allocated),
-                'free': self._bytes_to_mb(free),
-                'used_percentage': (used / allocated * 100) if allocated > 0 else 0
-            }
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def list_folder(self, path=""):
-        """Просмотреть содержимое папки"""
+            body = json.loads(text)
+        except ValueError:
+            raise ApiError(response.status, text or response.reason)
+        raise ApiError(response.status, body.get('error_summary', text), body.get('error'))
+
+    @asynccontextmanager
+    async def _post(self, url, **kwargs):
+        """POST-запрос к Dropbox с ограничением параллельности и повтором при 429"""
+        data = kwargs.get('data')
+        data_start = None
+        if hasattr(data, 'seek'):
+            # Файл передается блоками; перед повтором он перематывается в начало
+            data_start = data.tell()
+            size = data.seek(0, os.SEEK_END) - data_start
+            kwargs['headers'] = {**kwargs.get('headers', {}), 'Content-Length': str(size)}
+
+        delay = 1
+        for attempt in range(MAX_RETRIES + 1):
+            if data_start is not None:
+                data.seek(data_start)
+                kwargs['data'] = _read_chunks(data)
+            async with self._sem:
+                try:
+                    response = await self.session.post(url, **kwargs)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    raise DropboxError(f"Ошибка соединения с Dropbox: {e}") from e
+                if response.status != 429 or attempt == MAX_RETRIES:
+                    break
+                # Dropbox сообщает, сколько секунд ждать, в заголовке Retry-After
+                retry_after = float(response.headers.get('Retry-After', 0))
+                response.release()
+                await asyncio.sleep(max(retry_after, delay))
+                delay *= 2
         try:
-            result = self.dbx.files_list_folder(path)
-            items = []
-            
-            for entry in result.entries:
-                item = {
-                    'name': entry.name,
-                    'path': entry.path_lower,
-                    'is_folder': isinstance(entry, dropbox.files.FolderMetadata)
-                }
-                
-                if isinstance(entry, dropbox.files.FileMetadata):
-                    item.update({
-                        'size': entry.size,
-                        'modified': entry.server_modified,
-                        'size_mb': self._bytes_to_mb(entry.size)
-                    })
-                
-                items.append(item)
-            
-            return items
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def create_folder(self, path):
+            await self._raise_for_status(response)
+            yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise DropboxError(f"Ошибка соединения с Dropbox: {e}") from e
+        finally:
+            response.release()
+
+    async def _rpc(self, endpoint, payload=None):
+        """Вызвать RPC-эндпоинт Dropbox и вернуть JSON-ответ"""
+        async with self._post(f"{API_URL}/{endpoint}", json=payload) as response:
+            return await response.json()
+
+    async def _content(self, endpoint, arg, data=b''):
+        """Вызвать content-эндпоинт Dropbox (загрузка данных) и вернуть JSON-ответ"""
+        headers = {
+            'Dropbox-API-Arg': json.dumps(arg),
+            'Content-Type': 'application/octet-stream'
+        }
+        async with self._post(f"{CONTENT_URL}/{endpoint}", data=data, headers=headers) as response:
+            return await response.json()
+
+    def _invalidate(self, path):
+        """Сбросить кэш для измененного пути, его родителя и корня"""
+        path = path.rstrip('/').lower()
+        parent = path.rsplit('/', 1)[0]
+        for key in list(self._cache):
+            cached_path = key[1]
+            if cached_path in (parent, '', path) or cached_path.startswith(path + '/'):
+                del self._cache[key]
+
+        # Курсоры родителя и корня остаются: следующий list_folder получит изменения
+        for cached_path in list(self._cursors):
+            if cached_path == path or cached_path.startswith(path + '/'):
+                del self._cursors[cached_path]
+
+    @cached(ttl=CACHE_TTL)
+    async def get_user_info(self):
+        """Получить информацию о пользователе"""
+        user = await self._rpc("users/get_current_account")
+        return {
+            'name': user['name']['display_name'],
+            'email': user.get('email'),
+            'country': user.get('country'),
+            'profile_photo_url': user.get('profile_photo_url')
+        }
+
+    @cached(ttl=CACHE_TTL)
+    async def get_storage_info(self):
+        """Получить информацию о хранилище"""
+        usage = await self._rpc("users/get_space_usage")
+        used = usage.get('used', 0)
+
+        # Для individual и team аккаунтов поле allocated одинаковое
+        allocated = usage.get('allocation', {}).get('allocated', 0)
+
+        free = allocated - used if allocated > 0 else 0
+
+        return {
+            'used': round(used * _INV_MB, 2),
+            'allocated': round(allocated * _INV_MB, 2),
+            'free': round(free * _INV_MB, 2),
+            'used_percentage': (used / allocated * 100) if allocated > 0 else 0
+        }
+
+    @cached(ttl=CACHE_TTL)
+    async def list_folder(self, path=""):
+        """Просмотреть содержимое папки (все страницы, повторно - только изменения)"""
+        key = path.rstrip('/').lower()
+        state = self._cursors.pop(key, None)
+
+        if state:
+            cursor, entries, _ = state
+            try:
+                result = await self._rpc("files/list_folder/continue", {'cursor': cursor})
+            except ApiError as e:
+                # Курсор устарел - читаем папку заново
+                if e.error.get('.tag') != 'reset':
+                    raise
+                state = None
+
+        if not state:
+            entries = {}
+            result = await self._rpc("files/list_folder", {'path': path})
+
+        while True:
+            for entry in result['entries']:
+                if entry['.tag'] == 'deleted':
+                    entries.pop(entry['path_lower'], None)
+                    continue
+
+                # Удаленные записи отброшены выше, так что не-файл - это папка
+                if entry['.tag'] == 'file':
+                    size = entry['size']
+                    item = {
+                        'name': entry['name'],
+                        'path': entry.get('path_lower'),
+                        'is_folder': False,
+                        'size': size,
+                        'modified': _parse_datetime(entry.get('server_modified')),
+                        'size_mb': round(size * _INV_MB, 2)
+                    }
+                else:
+                    item = {
+                        'name': entry['name'],
+                        'path': entry.get('path_lower'),
+                        'is_folder': True
+                    }
+
+                entries[entry['path_lower']] = item
+
+            if not result['has_more']:
+                break
+            result = await self._rpc("files/list_folder/continue", {'cursor': result['cursor']})
+
+        items = list(entries.values())
+        etag = hashlib.blake2b(repr(items).encode(), digest_size=16).hexdigest()
+        self._cursors[key] = (result['cursor'], entries, f'"{etag}"')
+        while len(self._cursors) > MAX_CACHED_FOLDERS:
+            self._cursors.popitem(last=False)
+        return items
+
+    def get_folder_etag(self, path=""):
+        """ETag содержимого папки по последнему list_folder (None, если папка не читалась)"""
+        state = self._cursors.get(path.rstrip('/').lower())
+        return state[2] if state else None
+
+    async def create_folder(self, path):
         """Создать папку"""
-        try:
-            result = self.dbx.files_create_folder_v2(path)
-            return {'success': True, 'folder': result.metadata.name}
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def delete_item(self, path):
+        result = await self._rpc("files/create_folder_v2", {'path': path})
+        self._invalidate(path)
+        return {'success': True, 'folder': result['metadata']['name']}
+
+    async def delete_item(self, path):
         """Удалить файл или папку"""
+        await self._rpc("files/delete_v2", {'path': path})
+        self._invalidate(path)
+        return {'success': True}
+
+    async def upload_file(self, file, path):
+        """Загрузить файл (file - UploadFile: атрибуты size, file и асинхронный read)"""
+        if file.size is not None and file.size <= UPLOAD_CHUNK_SIZE:
+            # Небольшой файл aiohttp передает прямо из временного файла, без копии в памяти
+            result = await self._content("files/upload", {'path': path, 'mode': 'overwrite'}, file.file)
+            self._invalidate(path)
+            return {'success': True, 'file': result['name']}
+
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        next_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+
+        if not next_chunk:
+            result = await self._content("files/upload", {'path': path, 'mode': 'overwrite'}, chunk)
+        else:
+            result = await self._upload_session(file, chunk, next_chunk, path)
+
+        self._invalidate(path)
+        return {'success': True, 'file': result['name']}
+
+    async def _upload_session(self, file, chunk, next_chunk, path):
+        """Загрузить большой файл по частям через concurrent upload session"""
+        start = await self._content("files/upload_session/start", {'session_type': 'concurrent'})
+        session_id = start['session_id']
+        offset = 0
+
+        while next_chunk:
+            batch = []
+            while next_chunk and len(batch) < UPLOAD_PARALLEL_CHUNKS:
+                batch.append(self._content("files/upload_session/append_v2", {
+                    'cursor': {'session_id': session_id, 'offset': offset},
+                    'close': False
+                }, chunk))
+                offset += len(chunk)
+                chunk = next_chunk
+                next_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            await asyncio.gather(*batch)
+
+        # Последний чанк закрывает сессию, поэтому отправляется после всех остальных
+        await self._content("files/upload_session/append_v2", {
+            'cursor': {'session_id': session_id, 'offset': offset},
+            'close': True
+        }, chunk)
+        offset += len(chunk)
+
+        return await self._content("files/upload_session/finish", {
+            'cursor': {'session_id': session_id, 'offset': offset},
+            'commit': {'path': path, 'mode': 'overwrite'}
+        })
+
+    async def upload_files(self, files):
+        """Загрузить несколько файлов пакетом (files - список пар (файл, путь))"""
+        uploaded, failed = [], []
+        # Одновременно читаем не больше UPLOAD_PARALLEL_CHUNKS файлов
+        sem = asyncio.Semaphore(UPLOAD_PARALLEL_CHUNKS)
+
+        for i in range(0, len(files), UPLOAD_BATCH_SIZE):
+            batch = files[i:i + UPLOAD_BATCH_SIZE]
+            cursors = await asyncio.gather(*(self._upload_batch_entry(file, sem) for file, _ in batch))
+
+            result = await self._rpc("files/upload_session/finish_batch_v2", {'entries': [
+                {'cursor': cursor, 'commit': {'path': path, 'mode': 'overwrite'}}
+                for cursor, (_, path) in zip(cursors, batch)
+            ]})
+
+            for entry, (_, path) in zip(result['entries'], batch):
+                if entry['.tag'] == 'success':
+                    uploaded.append(entry['name'])
+                else:
+                    failed.append(path)
+                self._invalidate(path)
+
+        return {'success': True, 'files': uploaded, 'failed': failed}
+
+    async def _upload_batch_entry(self, file, sem):
+        """Загрузить содержимое файла в закрытую upload session и вернуть курсор"""
+        async with sem:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            next_chunk = await file.read(UPLOAD_CHUNK_SIZE) if chunk else b''
+            start = await self._content("files/upload_session/start", {'close': not next_chunk}, chunk)
+            session_id = start['session_id']
+            offset = len(chunk)
+
+            while next_chunk:
+                chunk = next_chunk
+                next_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                await self._content("files/upload_session/append_v2", {
+                    'cursor': {'session_id': session_id, 'offset': offset},
+                    'close': not next_chunk
+                }, chunk)
+                offset += len(chunk)
+
+            return {'session_id': session_id, 'offset': offset}
+
+    async def download_file(self, path):
+        """Скачать файл (содержимое возвращается асинхронным генератором)"""
+        stack = AsyncExitStack()
         try:
-            self.dbx.files_delete_v2(path)
-            return {'success': True}
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def upload_file(self, file_content, path):
-        """Загрузить файл"""
-        try:
-            result = self.dbx.files_upload(file_content, path, mode=dropbox.files.WriteMode.overwrite)
-            return {'success': True, 'file': result.name}
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def download_file(self, path):
-        """Скачать файл"""
-        try:
-            result = self.dbx.files_download(path)
-            return {
-                'success': True,
-                'content': result[1].content,
-                'filename': result[0].name
-            }
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def get_metadata(self, path):
+            headers = {'Dropbox-API-Arg': json.dumps({'path': path})}
+            response = await stack.enter_async_context(
+                self._post(f"{CONTENT_URL}/files/download", headers=headers)
+            )
+            metadata = json.loads(response.headers['Dropbox-API-Result'])
+        except BaseException:
+            await stack.aclose()
+            raise
+
+        async def stream():
+            # Соединение с Dropbox закрывается после отдачи последнего блока
+            async with stack:
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    yield chunk
+
+        return {
+            'success': True,
+            'content': stream(),
+            'filename': metadata['name'],
+            'size': metadata.get('size')
+        }
+
+    async def get_temporary_link(self, path):
+        """Получить временную (4 часа) ссылку для прямого скачивания файла"""
+        result = await self._rpc("files/get_temporary_link", {'path': path})
+        return result['link']
+
+    @cached(ttl=CACHE_TTL)
+    async def get_metadata(self, path):
         """Получить метаданные файла или папки"""
-        try:
-            metadata = self.dbx.files_get_metadata(path)
-            
-            result = {
-                'name': metadata.name,
-                'path': metadata.path_lower,
-                'is_folder': isinstance(metadata, dropbox.files.FolderMetadata)
+        metadata = await self._rpc("files/get_metadata", {'path': path})
+
+        if metadata['.tag'] == 'file':
+            size = metadata['size']
+            return {
+                'name': metadata['name'],
+                'path': metadata.get('path_lower'),
+                'is_folder': False,
+                'size': size,
+                'size_mb': round(size * _INV_MB, 2),
+                'modified': _parse_datetime(metadata.get('server_modified')),
+                'content_hash': metadata.get('content_hash')
             }
-            
-            if isinstance(metadata, dropbox.files.FileMetadata):
-                result.update({
-                    'size': metadata.size,
-                    'size_mb': self._bytes_to_mb(metadata.size),
-                    'modified': metadata.server_modified,
-                    'content_hash': metadata.content_hash if hasattr(metadata, 'content_hash') else None
-                })
-            
-            return result
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def create_shared_link(self, path):
+
+        return {
+            'name': metadata['name'],
+            'path': metadata.get('path_lower'),
+            'is_folder': metadata['.tag'] == 'folder'
+        }
+
+    async def create_shared_link(self, path):
         """Создать общую ссылку"""
         try:
-            settings = dropbox.sharing.SharedLinkSettings(
-                requested_visibility=dropbox.sharing.RequestedVisibility.public
-            )
-            result = self.dbx.sharing_create_shared_link_with_settings(path, settings)
-            return {'success': True, 'url': result.url}
+            result = await self._rpc("sharing/create_shared_link_with_settings", {
+                'path': path,
+                'settings': {'requested_visibility': 'public'}
+            })
+            self._cache.pop(('list_shared_links', ''), None)
+            return {'success': True, 'url': result['url']}
         except ApiError as e:
-            if e.error.is_shared_link_already_exists():
-                try:
-                    links = self.dbx.sharing_list_shared_links(path=path)
-                    if links.links:
-                        return {'success': True, 'url': links.links[0].url}
-                except:
-                    pass
-            return {'error': str(e)}
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def list_shared_links(self):
-        """Получить список общих ссылок"""
-        try:
-            result = self.dbx.sharing_list_shared_links()
-            shared_items = []
-            
-            for link in result.links:
+            if e.error.get('.tag') != 'shared_link_already_exists':
+                raise
+            # Ссылка уже существует - возвращаем ее
+            links = await self._rpc("sharing/list_shared_links", {'path': path, 'direct_only': True})
+            if not links['links']:
+                raise
+            return {'success': True, 'url': links['links'][0]['url']}
+
+    @cached(ttl=SHARED_LINKS_CACHE_TTL)
+    async def list_shared_links(self):
+        """Получить список общих ссылок (все страницы)"""
+        result = await self._rpc("sharing/list_shared_links", {})
+        shared_items = []
+
+        while True:
+            for link in result['links']:
                 shared_items.append({
-                    'url': link.url,
-                    'name': link.name,
-                    'path': link.path_lower if hasattr(link, 'path_lower') else None
+                    'url': link['url'],
+                    'name': link['name'],
+                    'path': link.get('path_lower')
                 })
-            
-            return shared_items
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def search(self, query, path=""):
+
+            if not result.get('has_more'):
+                break
+            result = await self._rpc("sharing/list_shared_links", {'cursor': result['cursor']})
+
+        return shared_items
+
+    async def search(self, query, path=""):
         """Поиск файлов"""
         try:
-            search_options = dropbox.files.SearchOptions(
-                path=path if path else None,
-                filename_only=True,
-                max_results=100
-            )
-            
-            result = self.dbx.files_search_v2(query, options=search_options)
+            search_options = {
+                'filename_only': True,
+                'max_results': 100
+            }
+            if path:
+                search_options['path'] = path
+
+            result = await self._rpc("files/search_v2", {'query': query, 'options': search_options})
             matches = []
-            
-            for match in result.matches:
-                if match.metadata:
-                    metadata = match.metadata.get_metadata() if hasattr(match.metadata, 'get_metadata') else match.metadata
-                    if metadata:
-                        matches.append({
-                            'name': metadata.name,
-                            'path': metadata.path_lower,
-                            'is_folder': isinstance(metadata, dropbox.files.FolderMetadata),
-                            'match_type': match.match_type.value if hasattr(match.match_type, 'value') else str(match.match_type)
-                        })
-            
+
+            for match in result['matches']:
+                metadata = match.get('metadata', {}).get('metadata')
+                if metadata:
+                    matches.append({
+                        'name': metadata['name'],
+                        'path': metadata.get('path_lower'),
+                        'is_folder': metadata['.tag'] == 'folder',
+                        'match_type': match.get('match_type', {}).get('.tag')
+                    })
+
             return matches
-        except Exception as e:
-            return {'error': f'Ошибка поиска: {str(e)}'}
-    
-    def _bytes_to_mb(self, bytes_value):
-        """Конвертировать байты в мегабайты"""
-        if bytes_value is None:
-            return 0
-        return round(bytes_value / (1024 * 1024), 2)
\ No newline at end of file
+        except DropboxError as e:
+            raise DropboxError(f'Ошибка поиска: {str(e)}') from e